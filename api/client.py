@@ -1,8 +1,13 @@
 import asyncio
+import random
+import socket
 import aiohttp
 from typing import Optional, Dict, Any
-from config import API_RETRY_COUNT, API_RETRY_BACKOFF_BASE
+from config import API_RETRY_COUNT, API_RETRY_BACKOFF_BASE, API_RETRY_BACKOFF_CAP
 from utils.logging_config import logger
+from utils.json_codec import loads, dumps
+
+_rng = random.Random()
 
 
 async def fetch_page(
@@ -17,7 +22,7 @@ async def fetch_page(
         try:
             async with session.get(url) as resp:
                 resp.raise_for_status()
-                return await resp.json()
+                return loads(await resp.read())
 
         except aiohttp.ClientError as e:
             logger.error(f"Client error fetching {url}: {e} (attempt {attempt}/{retries})")
@@ -35,13 +40,43 @@ async def fetch_page(
                 raise
 
         if attempt < retries:
-            wait_time = API_RETRY_BACKOFF_BASE ** attempt
-            logger.info(f"Retrying in {wait_time} seconds...")
+            # Full jitter: spread retries so concurrent clients don't retry in lockstep
+            wait_time = _rng.uniform(0, min(API_RETRY_BACKOFF_CAP, API_RETRY_BACKOFF_BASE ** attempt))
+            logger.info(f"Retrying in {wait_time:.2f} seconds...")
             await asyncio.sleep(wait_time)
 
     return None
 
 
-def create_session(timeout_seconds: int = 60) -> aiohttp.ClientSession:
+def create_resolver() -> aiohttp.abc.AbstractResolver:
+    try:
+        return aiohttp.AsyncResolver()
+    except (ImportError, RuntimeError) as e:
+        logger.warning(f"aiodns unavailable, falling back to threaded DNS resolver: {e}")
+        return aiohttp.ThreadedResolver()
+
+
+def create_session(timeout_seconds: int = 60, pool_size: int = 32) -> aiohttp.ClientSession:
+    """
+    Create a keep-alive HTTP session for the Kodik API.
+
+    Reuse the returned session for the whole sync run: its connector keeps
+    TCP/TLS connections open between requests, which a fresh session per
+    request would throw away.
+    """
     timeout = aiohttp.ClientTimeout(total=timeout_seconds)
-    return aiohttp.ClientSession(timeout=timeout)
+    connector = aiohttp.TCPConnector(
+        resolver=create_resolver(),
+        family=socket.AF_INET,
+        limit=pool_size,
+        limit_per_host=pool_size,
+        keepalive_timeout=75,
+        ttl_dns_cache=600,
+        enable_cleanup_closed=True
+    )
+    return aiohttp.ClientSession(
+        timeout=timeout,
+        connector=connector,
+        json_serialize=dumps,
+        headers={"Connection": "keep-alive", "User-Agent": "yomi-parser/1.0"}
+    )
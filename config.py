@@ -4,9 +4,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 API_TOKEN = os.getenv("API_TOKEN")
-BASE_URL = f"https://kodikapi.com/list?token={API_TOKEN}&types=anime-serial,anime&with_material_data=true&genres_type=all&lgbt=false"
+BASE_URL = f"https://kodikapi.com/list?token={API_TOKEN}&types=anime-serial,anime&with_material_data=true&genres_type=all&lgbt=false&sort=updated_at&order=desc"
 
-BATCH_SIZE = 200
+CONSECUTIVE_OLD_THRESHOLD = 50
+PAGE_LIMIT_FIRST_SYNC = 100
+# An incremental run stops after CONSECUTIVE_OLD_THRESHOLD old records, so one page can hold them all
+PAGE_LIMIT_INCREMENTAL = CONSECUTIVE_OLD_THRESHOLD
 SYNC_INTERVAL_SECONDS = int(os.getenv("SYNC_INTERVAL_SECONDS", "60"))
 
 DB_CONFIG = {
@@ -16,11 +19,13 @@ DB_CONFIG = {
     "db": os.getenv("DB_NAME"),
     "charset": "utf8mb4",
     "connect_timeout": 30,
-    "autocommit": False
+    "autocommit": True
 }
 
-DB_POOL_MIN_SIZE = 5
-DB_POOL_MAX_SIZE = 20
+# A page transaction holds one connection while names resolve on up to DB_CONCURRENCY others
+DB_POOL_SIZE = max(2, int(os.getenv("DB_POOL_SIZE") or "8"))
+DB_POOL_RECYCLE_SECONDS = 3600
+DB_CONCURRENCY = max(1, min(int(os.getenv("DB_CONCURRENCY") or "4"), DB_POOL_SIZE - 1))
 
 LOG_FILE = "log.txt"
 LAST_SYNC_FILE = "last_sync.txt"
@@ -30,5 +35,4 @@ YEAR_MAX = 2100
 
 API_RETRY_COUNT = 3
 API_RETRY_BACKOFF_BASE = 2
-
-CONSECUTIVE_OLD_THRESHOLD = 50
+API_RETRY_BACKOFF_CAP = 30
@@ -1,125 +1,301 @@
 import asyncio
 import aiomysql
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import DB_CONCURRENCY
+from db.connection import ConnectionPool
+from db.sql_utils import in_placeholders
 from utils.logging_config import logger
 
+# Width of the name column of each lookup table, as declared in db/schema.py
+NAME_MAX_LENGTH = {"genres": 200, "persons": 255, "studios": 255}
+
 
 class Cache:
     def __init__(self):
         self.genres: Dict[str, int] = {}
         self.persons: Dict[str, int] = {}
         self.studios: Dict[str, int] = {}
-        self._locks: Dict[str, asyncio.Lock] = {
-            "genres": asyncio.Lock(),
-            "persons": asyncio.Lock(),
-            "studios": asyncio.Lock(),
+        # kodik_id -> (anime_id, updated_at of the anime row)
+        self.anime: Dict[str, Tuple[int, Optional[datetime]]] = {}
+        self.existing_genres: Dict[int, Set[int]] = {}
+        self.existing_screenshots: Dict[int, Set[str]] = {}
+        self.existing_persons: Dict[int, Set[Tuple[int, str]]] = {}
+        self.existing_studios: Dict[int, Set[int]] = {}
+        self._inflight: Dict[str, Dict[str, asyncio.Future]] = {
+            "genres": {},
+            "persons": {},
+            "studios": {},
         }
+        self.loaded = False
+        self._name_semaphore: Optional[asyncio.Semaphore] = None
+        self.lookups = 0
+        self.db_lookups = 0
+        self.coalesced = 0
+        # Entries learned inside the current transaction, dropped on rollback
+        self._uncommitted_anime_ids: Set[int] = set()
+        self._uncommitted_kodik_ids: Set[str] = set()
 
     async def load(self, conn: aiomysql.Connection) -> None:
         logger.info("Loading cache from database...")
-        async with conn.cursor() as cur:
+        # Server-side cursor: rows are streamed into the dicts, never materialised as a list
+        async with conn.cursor(aiomysql.SSCursor) as cur:
             await cur.execute("SELECT id, name FROM genres")
-            rows = await cur.fetchall()
-            self.genres = {name: id for id, name in rows}
+            self.genres = {}
+            async for entity_id, name in cur:
+                self.genres[name] = entity_id
             logger.info(f"Loaded {len(self.genres)} genres")
 
             await cur.execute("SELECT id, name FROM persons")
-            rows = await cur.fetchall()
-            self.persons = {name: id for id, name in rows}
+            self.persons = {}
+            async for entity_id, name in cur:
+                self.persons[name] = entity_id
             logger.info(f"Loaded {len(self.persons)} persons")
 
             await cur.execute("SELECT id, name FROM studios")
-            rows = await cur.fetchall()
-            self.studios = {name: id for id, name in rows}
+            self.studios = {}
+            async for entity_id, name in cur:
+                self.studios[name] = entity_id
             logger.info(f"Loaded {len(self.studios)} studios")
 
-        logger.info("Cache loaded successfully")
+            await cur.execute("SELECT kodik_id, id, updated_at FROM anime WHERE kodik_id IS NOT NULL")
+            self.anime = {}
+            async for kodik_id, anime_id, updated_at in cur:
+                self.anime[kodik_id] = (anime_id, updated_at)
+            logger.info(f"Loaded {len(self.anime)} anime")
 
-    async def get_or_create(
-        self,
-        conn: aiomysql.Connection,
-        table: str,
-        cache: Dict[str, int],
-        name: str
-    ) -> Optional[int]:
-        if not name:
-            return None
+            await cur.execute("SELECT anime_id, genre_id FROM anime_genres")
+            self.existing_genres = {}
+            async for anime_id, genre_id in cur:
+                self.existing_genres.setdefault(anime_id, set()).add(genre_id)
 
-        if name in cache:
-            return cache[name]
+            await cur.execute("SELECT anime_id, url FROM anime_screenshots")
+            self.existing_screenshots = {}
+            async for anime_id, url in cur:
+                self.existing_screenshots.setdefault(anime_id, set()).add(url)
 
-        async with self._locks[table]:  
-            if name in cache:
-                return cache[name]
+            await cur.execute("SELECT anime_id, person_id, role FROM anime_persons")
+            self.existing_persons = {}
+            async for anime_id, person_id, role in cur:
+                self.existing_persons.setdefault(anime_id, set()).add((person_id, role))
 
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    f"INSERT IGNORE INTO {table} (name) VALUES (%s)",
-                    (name,)
-                )
+            await cur.execute("SELECT anime_id, studio_id FROM anime_studios")
+            self.existing_studios = {}
+            async for anime_id, studio_id in cur:
+                self.existing_studios.setdefault(anime_id, set()).add(studio_id)
+
+            logger.info(f"Loaded relation sets for {len(self.existing_genres)} anime")
+
+        self.loaded = True
+        logger.info("Cache loaded successfully")
+
+    async def refresh_since(self, conn: aiomysql.Connection, since: datetime) -> None:
+        """
+        Catch up with rows written by other processes instead of reloading everything.
+
+        Names only ever get appended, so rows above the highest cached id are
+        new. Anime rows are re-read when updated after `since`, and their
+        relation sets are dropped so the next sync fetches them fresh.
+        """
+        refreshed: List[int] = []
+        new_names = 0
+
+        async with conn.cursor(aiomysql.SSCursor) as cur:
+            for table, cache in (("genres", self.genres), ("persons", self.persons), ("studios", self.studios)):
                 await cur.execute(
-                    f"SELECT id FROM {table} WHERE name=%s",
-                    (name,)
+                    f"SELECT id, name FROM {table} WHERE id > %s",
+                    (max(cache.values(), default=0),)
                 )
-                row = await cur.fetchone()
-
-                if row:
-                    entity_id = row[0]
+                async for entity_id, name in cur:
                     cache[name] = entity_id
-                    return entity_id
-
-        return None
+                    new_names += 1
 
-    async def get_genre_id(self, conn: aiomysql.Connection, name: str) -> Optional[int]:
-        return await self.get_or_create(conn, "genres", self.genres, name)
+            await cur.execute(
+                "SELECT kodik_id, id, updated_at FROM anime WHERE kodik_id IS NOT NULL AND updated_at > %s",
+                (since,)
+            )
+            async for kodik_id, anime_id, updated_at in cur:
+                self.anime[kodik_id] = (anime_id, updated_at)
+                refreshed.append(anime_id)
 
-    async def get_person_id(self, conn: aiomysql.Connection, name: str) -> Optional[int]:
-        return await self.get_or_create(conn, "persons", self.persons, name)
+        self.forget_relations(refreshed)
+        logger.info(f"Cache refreshed: {new_names} new names, {len(refreshed)} anime updated since {since}")
 
-    async def get_studio_id(self, conn: aiomysql.Connection, name: str) -> Optional[int]:
-        return await self.get_or_create(conn, "studios", self.studios, name)
+    def _claim(self, table: str, names: List[str]) -> Dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight[table]
+        claimed = {}
+        for name in names:
+            future = loop.create_future()
+            inflight[name] = future
+            claimed[name] = future
+        return claimed
 
-    async def get_genre_ids_batch(
+    def _release(
         self,
-        conn: aiomysql.Connection,
-        names: list[str]
-    ) -> list[int]:
-        ids = []
-        for name in names:
-            if name:
-                genre_id = await self.get_genre_id(conn, name)
-                if genre_id:
-                    ids.append(genre_id)
-        return ids
+        table: str,
+        claimed: Dict[str, asyncio.Future],
+        cache: Dict[str, int],
+        error: Optional[BaseException] = None
+    ) -> None:
+        inflight = self._inflight[table]
+        for name, future in claimed.items():
+            inflight.pop(name, None)
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+                # Mark as retrieved so unawaited futures don't log a warning
+                future.exception()
+            else:
+                future.set_result(cache.get(name))
 
-    async def get_person_ids_batch(
+    async def resolve_many(
         self,
         conn: aiomysql.Connection,
-        names: list[str]
-    ) -> list[int]:
-        ids = []
-        for name in names:
-            if name:
-                person_id = await self.get_person_id(conn, name)
-                if person_id:
-                    ids.append(person_id)
-        return ids
+        table: str,
+        cache: Dict[str, int],
+        names: List[str]
+    ) -> List[int]:
+        inflight = self._inflight[table]
+        uncached = [name for name in dict.fromkeys(names) if name and name not in cache]
+
+        # Strict mode rejects a name wider than its column, which would fail the whole page;
+        # such names are dropped, as INSERT IGNORE + SELECT used to do
+        max_length = NAME_MAX_LENGTH[table]
+        too_long = [name for name in uncached if len(name) > max_length]
+        if too_long:
+            logger.warning(f"Skipping {len(too_long)} {table} name(s) longer than {max_length} characters")
+            uncached = [name for name in uncached if len(name) <= max_length]
+        pending = [inflight[name] for name in uncached if name in inflight]
+        uncached = [name for name in uncached if name not in inflight]
+
+        self.lookups += len(names)
+        self.coalesced += len(pending)
+
+        if uncached:
+            self.db_lookups += len(uncached)
+            claimed = self._claim(table, uncached)
+            try:
+                async with conn.cursor() as cur:
+                    if len(uncached) > 1:
+                        await cur.execute(
+                            f"INSERT IGNORE INTO {table} (name) VALUES "
+                            + ", ".join(["(%s)"] * len(uncached)),
+                            uncached
+                        )
+                        await cur.execute(
+                            f"SELECT id, name FROM {table} WHERE name IN ({in_placeholders(len(uncached))})",
+                            uncached
+                        )
+                        rows = await cur.fetchall()
+                        by_name = {name: entity_id for entity_id, name in rows}
+                        for name in uncached:
+                            if name in by_name:
+                                cache[name] = by_name[name]
+
+                    # The name column's collation ignores case and accents, so a name can match a row
+                    # stored under another spelling; LAST_INSERT_ID(id) returns that row's id for it
+                    for name in uncached:
+                        if name not in cache:
+                            await cur.execute(
+                                f"INSERT INTO {table} (name) VALUES (%s) "
+                                f"ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
+                                (name,)
+                            )
+                            if cur.lastrowid:
+                                cache[name] = cur.lastrowid
+            except BaseException as e:
+                self._release(table, claimed, cache, e)
+                raise
 
-    async def get_studio_ids_batch(
+            self._release(table, claimed, cache)
+
+        if pending:
+            await asyncio.gather(*pending)
+
+        return [cache[name] for name in names if name and name in cache]
+
+    async def resolve_names(
         self,
-        conn: aiomysql.Connection,
-        names: list[str]
-    ) -> list[int]:
-        ids = []
-        for name in names:
-            if name:
-                studio_id = await self.get_studio_id(conn, name)
-                if studio_id:
-                    ids.append(studio_id)
-        return ids
+        db_pool: ConnectionPool,
+        genres: Iterable[str],
+        persons: Iterable[str],
+        studios: Iterable[str]
+    ) -> None:
+        """
+        Make sure every given name is in the cache.
+
+        Each table is resolved with one multi-row statement on its own pooled
+        connection, concurrently. Those connections autocommit, so the names
+        survive a rolled back batch.
+        """
+        # Created lazily so it belongs to the running event loop; shared by every call so the
+        # limit holds across overlapping batches
+        if self._name_semaphore is None:
+            self._name_semaphore = asyncio.Semaphore(DB_CONCURRENCY)
+        semaphore = self._name_semaphore
+
+        async def resolve_table(table: str, cache: Dict[str, int], names: List[str]) -> None:
+            max_length = NAME_MAX_LENGTH[table]
+            if all(name in cache or len(name) > max_length for name in names if name):
+                self.lookups += len(names)
+                return
+            async with semaphore, db_pool.acquire() as conn:
+                await self.resolve_many(conn, table, cache, names)
+
+        await asyncio.gather(
+            resolve_table("genres", self.genres, list(genres)),
+            resolve_table("persons", self.persons, list(persons)),
+            resolve_table("studios", self.studios, list(studios)),
+        )
+
+    def reset_stats(self) -> None:
+        self.lookups = 0
+        self.db_lookups = 0
+        self.coalesced = 0
+
+    def log_stats(self) -> None:
+        per_1000 = 1000 * self.db_lookups / self.lookups if self.lookups else 0.0
+        logger.info(
+            f"Cache lookups: {self.lookups}, "
+            f"database misses: {self.db_lookups} ({per_1000:.1f} per 1000 lookups), "
+            f"coalesced waits: {self.coalesced}"
+        )
+
+    def remember_anime(self, kodik_id: Optional[str], anime_id: int, updated_at: Optional[datetime]) -> None:
+        if kodik_id:
+            self.anime[kodik_id] = (anime_id, updated_at)
+            self._uncommitted_kodik_ids.add(kodik_id)
+
+    def track_relations(self, anime_ids: Iterable[int]) -> None:
+        self._uncommitted_anime_ids.update(anime_ids)
+
+    def commit(self) -> None:
+        self._uncommitted_anime_ids.clear()
+        self._uncommitted_kodik_ids.clear()
+
+    def rollback(self) -> None:
+        for kodik_id in self._uncommitted_kodik_ids:
+            self.anime.pop(kodik_id, None)
+        self.forget_relations(self._uncommitted_anime_ids)
+        self.commit()
+
+    def forget_relations(self, anime_ids: Iterable[int]) -> None:
+        for anime_id in anime_ids:
+            self.existing_genres.pop(anime_id, None)
+            self.existing_screenshots.pop(anime_id, None)
+            self.existing_persons.pop(anime_id, None)
+            self.existing_studios.pop(anime_id, None)
 
     def clear(self) -> None:
         self.genres.clear()
         self.persons.clear()
         self.studios.clear()
+        self.anime.clear()
+        self.existing_genres.clear()
+        self.existing_screenshots.clear()
+        self.existing_persons.clear()
+        self.existing_studios.clear()
+        self.loaded = False
         logger.info("Cache cleared")
@@ -1,23 +1,36 @@
+import asyncio
 import aiomysql
 from typing import Optional
 from contextlib import asynccontextmanager
-from config import DB_CONFIG, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE
+from config import DB_CONFIG, DB_POOL_SIZE, DB_POOL_RECYCLE_SECONDS
 from utils.logging_config import logger
 
 
 class ConnectionPool:
     def __init__(self):
         self._pool: Optional[aiomysql.Pool] = None
+        self._create_lock: Optional[asyncio.Lock] = None
 
     async def create(self) -> None:
-        if self._pool is None:
-            logger.info(f"Creating connection pool (min={DB_POOL_MIN_SIZE}, max={DB_POOL_MAX_SIZE})")
-            self._pool = await aiomysql.create_pool(
-                minsize=DB_POOL_MIN_SIZE,
-                maxsize=DB_POOL_MAX_SIZE,
-                **DB_CONFIG
-            )
-            logger.info("Connection pool created successfully")
+        if self._pool is not None:
+            return
+
+        # Created lazily so the lock belongs to the running event loop
+        if self._create_lock is None:
+            self._create_lock = asyncio.Lock()
+
+        async with self._create_lock:
+            # Another coroutine may have created the pool while we waited
+            if self._pool is None:
+                logger.info(f"Creating connection pool (size={DB_POOL_SIZE})")
+                # minsize == maxsize preallocates every connection up front
+                self._pool = await aiomysql.create_pool(
+                    minsize=DB_POOL_SIZE,
+                    maxsize=DB_POOL_SIZE,
+                    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+                    **DB_CONFIG
+                )
+                logger.info("Connection pool created successfully")
 
     async def close(self) -> None:
         if self._pool:
@@ -29,8 +42,7 @@ class ConnectionPool:
 
     @asynccontextmanager
     async def acquire(self):
-        if self._pool is None:
-            await self.create()
+        await self.create()
 
         async with self._pool.acquire() as conn:
             yield conn
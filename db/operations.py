@@ -1,13 +1,16 @@
 """Database operations for anime data."""
-import json
 import aiomysql
-from typing import Dict, Any, Optional, Tuple, Set
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Set
 from datetime import datetime
 from utils.parsers import parse_datetime, parse_date
 from utils.logging_config import logger
+from utils.json_codec import loads, dumps
 from models.anime import (
     AnimeDict,
     MaterialDict,
+    EMPTY_MATERIAL,
     extract_genres,
     extract_screenshots,
     get_person_mapping,
@@ -16,449 +19,755 @@ from models.anime import (
     normalize_blocked_seasons
 )
 from db.cache import Cache
+from db.connection import ConnectionPool
+from db.sql_utils import in_placeholders, multirow_insert
 
 
-async def find_existing_anime(
-    conn: aiomysql.Connection,
-    item: AnimeDict,
-    material: Optional[MaterialDict]
-) -> Optional[int]:
+def _fold(value: Any) -> str:
+    """Fold case and accents away, as the utf8mb4 *_ai_ci collations do when comparing."""
+    decomposed = unicodedata.normalize("NFKD", str(value))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def _match_keys(
+    shikimori_id: Any,
+    imdb_id: Any,
+    title_orig: Optional[str],
+    year: Any
+) -> List[Tuple[Any, ...]]:
+    """
+    Keys recognising rows/entries of the same anime.
+
+    MySQL finds candidate rows under the column collation, so values are
+    folded the same way; otherwise "Pokemon" would miss a stored "Pokémon"
+    and the entry would be inserted as a new anime.
+    """
+    keys: List[Tuple[Any, ...]] = []
+    if shikimori_id:
+        keys.append(("shikimori_id", _fold(shikimori_id)))
+    if imdb_id:
+        keys.append(("imdb_id", _fold(imdb_id)))
+    if title_orig and year:
+        keys.append(("title_year", _fold(title_orig), int(year)))
+    return keys
+
+
+def _item_match_keys(item: AnimeDict, material: Optional[MaterialDict]) -> List[Tuple[Any, ...]]:
+    return _match_keys(
+        item.get("shikimori_id") or (material or EMPTY_MATERIAL).get("shikimori_id"),
+        item.get("imdb_id"),
+        item.get("title_orig"),
+        item.get("year")
+    )
+
+
+async def find_existing_anime_batch(
+    cur: aiomysql.Cursor,
+    entries: List[Tuple[AnimeDict, Optional[MaterialDict]]]
+) -> List[Optional[Tuple[int, Optional[datetime]]]]:
     """
-    Find existing anime by shikimori_id, imdb_id, or title+year.
+    Find existing anime for a batch of entries with a single query.
+
+    An entry matches a row by shikimori_id, imdb_id or title+year, preferring
+    the most recently updated row, and otherwise by its kodik_id.
 
     Args:
-        conn: Database connection
-        item: Anime item data
-        material: Material data
+        cur: Database cursor
+        entries: List of (item, material) pairs
 
     Returns:
-        Anime ID if found, None otherwise
+        List of (anime_id, updated_at) tuples or None, aligned with entries
     """
-    async with conn.cursor() as cur:
-        shikimori_id = item.get("shikimori_id") or (material or {}).get("shikimori_id")
-        imdb_id = item.get("imdb_id")
-        title_orig = item.get("title_orig")
-        year = item.get("year")
+    entry_keys = [_item_match_keys(item, material) for item, material in entries]
+    kodik_ids = list({kodik_id for kodik_id in (item.get("id") for item, _ in entries) if kodik_id})
+
+    # Query with the values as sent; the folded keys are only for matching rows to entries
+    shikimori_ids = list({
+        str(shikimori_id)
+        for shikimori_id in (
+            item.get("shikimori_id") or (material or EMPTY_MATERIAL).get("shikimori_id")
+            for item, material in entries
+        )
+        if shikimori_id
+    })
+    imdb_ids = list({str(imdb_id) for imdb_id in (item.get("imdb_id") for item, _ in entries) if imdb_id})
+    title_years = list({
+        (title_orig, year)
+        for title_orig, year in ((item.get("title_orig"), item.get("year")) for item, _ in entries)
+        if title_orig and year
+    })
+
+    # One SELECT per lookup column, UNIONed: each branch uses its own index,
+    # where a single OR across the columns tends to fall back to a table scan
+    select = "SELECT id, kodik_id, updated_at, shikimori_id, imdb_id, title_orig, year FROM anime WHERE "
+    selects = []
+    params: List[Any] = []
+
+    if shikimori_ids:
+        selects.append(f"{select}shikimori_id IN ({in_placeholders(len(shikimori_ids))})")
+        params.extend(shikimori_ids)
+
+    if imdb_ids:
+        selects.append(f"{select}imdb_id IN ({in_placeholders(len(imdb_ids))})")
+        params.extend(imdb_ids)
+
+    if title_years:
+        selects.append(f"{select}(title_orig, year) IN ({in_placeholders(len(title_years), 2)})")
+        params.extend(value for pair in title_years for value in pair)
+
+    if kodik_ids:
+        selects.append(f"{select}kodik_id IN ({in_placeholders(len(kodik_ids))})")
+        params.extend(kodik_ids)
+
+    if not selects:
+        return [None] * len(entries)
+
+    await cur.execute(" UNION ".join(selects), params)
+    rows = await cur.fetchall()
+
+    # Most recently updated row per key, as ORDER BY updated_at DESC did (NULLs last)
+    best_by_key: Dict[Tuple[Any, ...], Tuple[int, Optional[datetime]]] = {}
+    by_kodik_id: Dict[str, Tuple[int, Optional[datetime]]] = {}
+
+    for anime_id, kodik_id, updated_at, shikimori_id, imdb_id, title_orig, year in rows:
+        by_kodik_id[kodik_id] = (anime_id, updated_at)
+        for key in _match_keys(shikimori_id, imdb_id, title_orig, year):
+            best = best_by_key.get(key)
+            if best is None or (updated_at and (best[1] is None or updated_at > best[1])):
+                best_by_key[key] = (anime_id, updated_at)
+
+    results: List[Optional[Tuple[int, Optional[datetime]]]] = []
+    for (item, _), keys in zip(entries, entry_keys):
+        match = None
+        for key in keys:
+            candidate = best_by_key.get(key)
+            if candidate and (match is None or (candidate[1] and (match[1] is None or candidate[1] > match[1]))):
+                match = candidate
+
+        if match:
+            logger.info(f"Found existing anime ID {match[0]} for kodik_id {item.get('id')}")
+        else:
+            match = by_kodik_id.get(item.get("id"))
 
-        conditions = []
-        params = []
+        results.append(match)
 
-        if shikimori_id:
-            conditions.append("shikimori_id = %s")
-            params.append(shikimori_id)
+    return results
 
-        if imdb_id:
-            conditions.append("imdb_id = %s")
-            params.append(imdb_id)
 
-        if title_orig and year:
-            conditions.append("(title_orig = %s AND year = %s)")
-            params.extend([title_orig, year])
+# Column order of the anime upsert, fixed so the SQL text never changes
+ANIME_COLUMNS = (
+    "id", "kodik_id", "kodik_type", "link", "title", "title_orig", "other_title", "year",
+    "last_season", "last_episode", "episodes_count", "kinopoisk_id", "imdb_id", "shikimori_id",
+    "quality", "camrip", "lgbt", "created_at", "updated_at", "description", "anime_description",
+    "poster_url", "anime_poster_url", "premiere_world", "aired_at", "released_at", "rating_mpaa",
+    "minimal_age", "episodes_total", "episodes_aired", "imdb_rating", "imdb_votes",
+    "shikimori_rating", "shikimori_votes", "next_episode_at", "all_status", "anime_kind", "duration"
+)
+ANIME_ROW_PLACEHOLDER = "(" + ", ".join(["%s"] * len(ANIME_COLUMNS)) + ")"
+ANIME_UPSERT_PREFIX = f"INSERT INTO anime ({', '.join(ANIME_COLUMNS)}) VALUES "
+ANIME_UPSERT_SUFFIX = " ON DUPLICATE KEY UPDATE " + ", ".join(
+    f"{col} = VALUES({col})" for col in ANIME_COLUMNS if col != "id"
+)
 
-        if not conditions:
-            return None
 
-        where_clause = " OR ".join(conditions)
-        query = f"""
-            SELECT id, kodik_id, updated_at FROM anime
-            WHERE {where_clause}
-            ORDER BY updated_at DESC
-            LIMIT 1
-        """
+def build_anime_row(
+    anime_id: Optional[int],
+    item: AnimeDict,
+    material: Optional[MaterialDict]
+) -> Tuple[Any, ...]:
+    """
+    Build the anime upsert values, positionally in ANIME_COLUMNS order.
 
-        await cur.execute(query, params)
-        row = await cur.fetchone()
+    Single source of truth for anime field mapping to eliminate duplication.
 
-        if row:
-            anime_id = row[0]
-            logger.info(f"Found existing anime ID {anime_id} for kodik_id {item.get('id')}")
-            return anime_id
+    Args:
+        anime_id: Existing anime ID, or None for a new row
+        item: Anime item data
+        material: Material data
 
-        return None
+    Returns:
+        Tuple of anime field values
+    """
+    mat = material or EMPTY_MATERIAL
+    return (
+        anime_id,
+        item.get("id"),
+        item.get("type"),
+        item.get("link"),
+        item.get("title"),
+        item.get("title_orig"),
+        item.get("other_title"),
+        item.get("year"),
+        item.get("last_season"),
+        item.get("last_episode"),
+        item.get("episodes_count"),
+        item.get("kinopoisk_id"),
+        item.get("imdb_id"),
+        item.get("shikimori_id") or mat.get("shikimori_id"),
+        item.get("quality"),
+        1 if item.get("camrip") else 0,
+        1 if item.get("lgbt") else 0,
+        parse_datetime(item.get("created_at")),
+        parse_datetime(item.get("updated_at")),
+        mat.get("description"),
+        mat.get("anime_description"),
+        mat.get("poster_url"),
+        mat.get("anime_poster_url"),
+        parse_date(mat.get("premiere_world")),
+        parse_date(mat.get("aired_at")),
+        parse_date(mat.get("released_at")),
+        mat.get("rating_mpaa"),
+        mat.get("minimal_age"),
+        mat.get("episodes_total"),
+        mat.get("episodes_aired"),
+        mat.get("imdb_rating"),
+        mat.get("imdb_votes"),
+        mat.get("shikimori_rating"),
+        mat.get("shikimori_votes"),
+        parse_datetime(mat.get("next_episode_at")),
+        mat.get("all_status"),
+        mat.get("anime_kind"),
+        mat.get("duration")
+    )
+
+
+@lru_cache(maxsize=128)
+def anime_upsert_sql(row_count: int) -> str:
+    return ANIME_UPSERT_PREFIX + ", ".join([ANIME_ROW_PLACEHOLDER] * row_count) + ANIME_UPSERT_SUFFIX
+
+
+def is_known_unchanged(cache: Cache, item: AnimeDict) -> bool:
+    """True when the cache maps the item's kodik_id to a row at least as new as the item."""
+    known = cache.anime.get(item.get("id"))
+    if not known or not known[1]:
+        return False
+    item_updated = parse_datetime(item.get("updated_at"))
+    return item_updated is not None and item_updated <= known[1]
 
 
-def build_anime_values(item: AnimeDict, material: Optional[MaterialDict]) -> Dict[str, Any]:
+async def upsert_anime_batch(
+    cur: aiomysql.Cursor,
+    cache: Cache,
+    entries: List[Tuple[AnimeDict, Optional[MaterialDict]]]
+) -> List[Tuple[int, bool, bool]]:
     """
-    Build anime values dictionary from item and material data.
+    Insert or update a batch of anime records with one multi-row statement.
 
-    Single source of truth for anime field mapping to eliminate duplication.
+    Entries are grouped per target anime: either the row matched by
+    find_existing_anime_batch, or, for anime not in the database yet,
+    other entries of the same batch sharing a match key. Only the newest
+    entry of each group is written, mirroring the sequential behaviour
+    where older entries of the same anime did not overwrite newer data.
+
+    Entries whose kodik_id the cache already maps to a row at least as new
+    are reported unchanged without touching the database.
 
     Args:
-        item: Anime item data
-        material: Material data
+        cur: Database cursor
+        cache: Cache instance
+        entries: List of (item, material) pairs
 
     Returns:
-        Dictionary of anime field values
+        List of (anime_id, changed, added) tuples, aligned with entries
     """
-    mat = material or {}
-    return {
-        "kodik_type": item.get("type"),
-        "link": item.get("link"),
-        "title": item.get("title"),
-        "title_orig": item.get("title_orig"),
-        "other_title": item.get("other_title"),
-        "year": item.get("year"),
-        "last_season": item.get("last_season"),
-        "last_episode": item.get("last_episode"),
-        "episodes_count": item.get("episodes_count"),
-        "kinopoisk_id": item.get("kinopoisk_id"),
-        "imdb_id": item.get("imdb_id"),
-        "shikimori_id": item.get("shikimori_id") or mat.get("shikimori_id"),
-        "quality": item.get("quality"),
-        "camrip": 1 if item.get("camrip") else 0,
-        "lgbt": 1 if item.get("lgbt") else 0,
-        "created_at": parse_datetime(item.get("created_at")),
-        "updated_at": parse_datetime(item.get("updated_at")),
-        "description": mat.get("description"),
-        "anime_description": mat.get("anime_description"),
-        "poster_url": mat.get("poster_url"),
-        "anime_poster_url": mat.get("anime_poster_url"),
-        "premiere_world": parse_date(mat.get("premiere_world")),
-        "aired_at": parse_date(mat.get("aired_at")),
-        "released_at": parse_date(mat.get("released_at")),
-        "rating_mpaa": mat.get("rating_mpaa"),
-        "minimal_age": mat.get("minimal_age"),
-        "episodes_total": mat.get("episodes_total"),
-        "episodes_aired": mat.get("episodes_aired"),
-        "imdb_rating": mat.get("imdb_rating"),
-        "imdb_votes": mat.get("imdb_votes"),
-        "shikimori_rating": mat.get("shikimori_rating"),
-        "shikimori_votes": mat.get("shikimori_votes"),
-        "next_episode_at": parse_datetime(mat.get("next_episode_at")),
-        "all_status": mat.get("all_status"),
-        "anime_kind": mat.get("anime_kind"),
-        "duration": mat.get("duration")
-    }
+    if not entries:
+        return []
+
+    all_entries = entries
+    all_updated = [parse_datetime(item.get("updated_at")) for item, _ in entries]
+    final: List[Optional[Tuple[int, bool, bool]]] = [None] * len(entries)
+
+    # Entries already known to be no newer than their row need no query at all
+    pending: List[int] = []
+    for index, (item, _) in enumerate(entries):
+        if is_known_unchanged(cache, item):
+            final[index] = (cache.anime[item.get("id")][0], False, False)
+        else:
+            pending.append(index)
+
+    if not pending:
+        return final
+
+    entries = [all_entries[index] for index in pending]
+    updated = [all_updated[index] for index in pending]
+
+    # Group entries per target anime
+    groups: List[Dict[str, Any]] = []
+    group_by_id: Dict[int, Dict[str, Any]] = {}
+    group_by_key: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    group_of: List[Dict[str, Any]] = []
+
+    matches = await find_existing_anime_batch(cur, entries)
+
+    for (item, material), existing in zip(entries, matches):
+        keys = _item_match_keys(item, material)
+
+        if existing:
+            group = group_by_id.get(existing[0])
+            if group is None:
+                group = {"id": existing[0], "db_updated": existing[1], "row_updated": existing[1], "members": []}
+                group_by_id[existing[0]] = group
+                groups.append(group)
+        else:
+            group = next((group_by_key[k] for k in keys if k in group_by_key), None)
+            if group is None:
+                group = {"id": None, "db_updated": None, "row_updated": None, "members": []}
+                groups.append(group)
+
+        for key in keys:
+            group_by_key.setdefault(key, group)
+        group["members"].append(len(group_of))
+        group_of.append(group)
+
+    # Pick the entry to write for each group
+    results: List[Tuple[Optional[int], bool, bool]] = [(group["id"], False, False) for group in group_of]
+    to_write: List[Tuple[Dict[str, Any], int]] = []
+
+    for group in groups:
+        writer = group["members"][0]
+        for index in group["members"][1:]:
+            if updated[index] and (updated[writer] is None or updated[index] > updated[writer]):
+                writer = index
+
+        db_updated = group["db_updated"]
+        if group["id"] and db_updated and updated[writer] and updated[writer] <= db_updated:
+            continue
+
+        to_write.append((group, writer))
+        group["row_updated"] = updated[writer]
+        results[writer] = (group["id"], True, group["id"] is None)
+
+    if to_write:
+        params = []
+        for group, writer in to_write:
+            item, material = entries[writer]
+            params.extend(build_anime_row(group["id"], item, material))
+
+        await cur.execute(
+            anime_upsert_sql(len(to_write)),
+            params
+        )
+
+        # Recover ids of the rows that were just inserted
+        new_kodik_ids = [entries[writer][0].get("id") for group, writer in to_write if group["id"] is None]
+        if new_kodik_ids:
+            await cur.execute(
+                f"SELECT id, kodik_id FROM anime WHERE kodik_id IN ({','.join(['%s'] * len(new_kodik_ids))})",
+                new_kodik_ids
+            )
+            new_ids = {row[1]: row[0] for row in await cur.fetchall()}
+
+            for group, writer in to_write:
+                if group["id"] is None:
+                    group["id"] = new_ids.get(entries[writer][0].get("id"))
+
+    for position, index in enumerate(pending):
+        group = group_of[position]
+        _, changed, added = results[position]
+        final[index] = (group["id"], changed, added)
+        if group["id"]:
+            cache.remember_anime(all_entries[index][0].get("id"), group["id"], group["row_updated"])
+
+    return final
 
 
 async def upsert_anime(
-    conn: aiomysql.Connection,
+    cur: aiomysql.Cursor,
+    cache: Cache,
     item: AnimeDict,
     material: Optional[MaterialDict]
 ) -> Tuple[int, bool, bool]:
     """
-    Insert or update anime record.
+    Insert or update a single anime record.
 
     Args:
-        conn: Database connection
+        cur: Database cursor
+        cache: Cache instance
         item: Anime item data
         material: Material data
 
     Returns:
         Tuple of (anime_id, changed, added)
     """
-    async with conn.cursor() as cur:
-        kodik_id = item.get("id")
-        item_updated = parse_datetime(item.get("updated_at"))
+    results = await upsert_anime_batch(cur, cache, [(item, material)])
+    return results[0]
+
+
+async def fetch_existing_genres_bulk(
+    cur: aiomysql.Cursor,
+    anime_ids: List[int]
+) -> Dict[int, Set[int]]:
+    """Fetch existing genre IDs for several anime, keyed by anime ID."""
+    existing: Dict[int, Set[int]] = {anime_id: set() for anime_id in anime_ids}
+    await cur.execute(
+        f"SELECT anime_id, genre_id FROM anime_genres WHERE anime_id IN ({in_placeholders(len(anime_ids))})",
+        anime_ids
+    )
+    for anime_id, genre_id in await cur.fetchall():
+        existing[anime_id].add(genre_id)
+    return existing
+
+
+async def fetch_existing_screenshots_bulk(
+    cur: aiomysql.Cursor,
+    anime_ids: List[int]
+) -> Dict[int, Set[str]]:
+    """Fetch existing screenshot URLs for several anime, keyed by anime ID."""
+    existing: Dict[int, Set[str]] = {anime_id: set() for anime_id in anime_ids}
+    await cur.execute(
+        f"SELECT anime_id, url FROM anime_screenshots WHERE anime_id IN ({in_placeholders(len(anime_ids))})",
+        anime_ids
+    )
+    for anime_id, url in await cur.fetchall():
+        existing[anime_id].add(url)
+    return existing
+
+
+async def fetch_existing_persons_bulk(
+    cur: aiomysql.Cursor,
+    anime_ids: List[int]
+) -> Dict[int, Set[Tuple[int, str]]]:
+    """Fetch existing (person_id, role) tuples for several anime, keyed by anime ID."""
+    existing: Dict[int, Set[Tuple[int, str]]] = {anime_id: set() for anime_id in anime_ids}
+    await cur.execute(
+        f"SELECT anime_id, person_id, role FROM anime_persons WHERE anime_id IN ({in_placeholders(len(anime_ids))})",
+        anime_ids
+    )
+    for anime_id, person_id, role in await cur.fetchall():
+        existing[anime_id].add((person_id, role))
+    return existing
+
+
+async def fetch_existing_studios_bulk(
+    cur: aiomysql.Cursor,
+    anime_ids: List[int]
+) -> Dict[int, Set[int]]:
+    """Fetch existing studio IDs for several anime, keyed by anime ID."""
+    existing: Dict[int, Set[int]] = {anime_id: set() for anime_id in anime_ids}
+    await cur.execute(
+        f"SELECT anime_id, studio_id FROM anime_studios WHERE anime_id IN ({in_placeholders(len(anime_ids))})",
+        anime_ids
+    )
+    for anime_id, studio_id in await cur.fetchall():
+        existing[anime_id].add(studio_id)
+    return existing
+
+
+async def fetch_existing_blocked_countries_bulk(
+    cur: aiomysql.Cursor,
+    anime_ids: List[int]
+) -> Dict[int, Set[str]]:
+    """Fetch existing blocked countries for several anime, keyed by anime ID."""
+    existing: Dict[int, Set[str]] = {anime_id: set() for anime_id in anime_ids}
+    await cur.execute(
+        f"SELECT anime_id, country FROM blocked_countries WHERE anime_id IN ({in_placeholders(len(anime_ids))})",
+        anime_ids
+    )
+    for anime_id, country in await cur.fetchall():
+        existing[anime_id].add(country)
+    return existing
+
+
+async def fetch_existing_blocked_seasons_bulk(
+    cur: aiomysql.Cursor,
+    anime_ids: List[int]
+) -> Dict[int, Dict[str, Any]]:
+    """Fetch existing blocked seasons for several anime as {season: decoded data}, keyed by anime ID."""
+    existing: Dict[int, Dict[str, Any]] = {anime_id: {} for anime_id in anime_ids}
+    await cur.execute(
+        f"SELECT anime_id, season, blocked_data FROM blocked_seasons WHERE anime_id IN ({in_placeholders(len(anime_ids))})",
+        anime_ids
+    )
+    for anime_id, season, blocked_data in await cur.fetchall():
+        # MySQL re-serialises JSON columns, so compare decoded values
+        existing[anime_id][season] = loads(blocked_data) if blocked_data is not None else None
+    return existing
+
+
+# Names of one material: (genres, person mapping, studios)
+ExtractedNames = Tuple[List[str], Dict[str, List[str]], List[str]]
+
+
+async def resolve_relation_names(
+    db_pool: ConnectionPool,
+    cache: Cache,
+    materials: List[Optional[MaterialDict]]
+) -> List[ExtractedNames]:
+    """
+    Resolve every genre, person and studio name of the given materials into the cache.
 
-        # Check if anime already exists by matching criteria
-        existing_anime_id = await find_existing_anime(conn, item, material)
+    Uses its own pooled connections, so it can run alongside work on the
+    batch transaction.
 
-        # Build values once for both INSERT and UPDATE
-        values = build_anime_values(item, material)
+    Returns:
+        List of (genres, person mapping, studios) name lists, aligned with materials
+    """
+    extracted = [
+        (extract_genres(material), get_person_mapping(material), get_studios(material))
+        for material in materials
+    ]
+    await cache.resolve_names(
+        db_pool,
+        [name for genres, _, _ in extracted for name in genres],
+        [name for _, mapping, _ in extracted for people in mapping.values() if people for name in people],
+        [name for _, _, studios in extracted for name in studios]
+    )
+    return extracted
+
+
+async def sync_relations_batch(
+    cur: aiomysql.Cursor,
+    db_pool: ConnectionPool,
+    cache: Cache,
+    entries: List[Tuple[int, AnimeDict, Optional[MaterialDict]]],
+    extracted: Optional[List[Optional[ExtractedNames]]] = None
+) -> None:
+    """
+    Sync relations (genres, screenshots, persons, studios, etc.) for a batch of anime.
+
+    Runs in three phases: take the existing relation sets from the cache
+    (fetching the ones it lacks with one SELECT per table), diff them
+    against the desired sets in memory, then flush only the rows that
+    were added or removed, using one statement per table. The new sets
+    are then stored back in the cache. When an anime appears more than
+    once, the last entry wins, as it did when entries were synced one at
+    a time. Genre, person and studio names are resolved up front with one
+    statement per table, on connections from db_pool, so building the
+    sets is pure dict lookups. Entries whose names the caller already
+    resolved with resolve_relation_names are not resolved again.
 
-        if existing_anime_id:
-            # Check if update is needed
+    Args:
+        cur: Database cursor
+        db_pool: Connection pool used for name resolution
+        cache: Cache instance
+        entries: List of (anime_id, item, material) tuples
+        extracted: Optional resolve_relation_names results aligned with
+            entries, None where an entry still needs resolving
+    """
+    if not entries:
+        return
+
+    anime_ids = list(dict.fromkeys(anime_id for anime_id, _, _ in entries))
+
+    # Phase 1: existing relation sets, from the cache where possible
+    for existing, fetch in (
+        (cache.existing_genres, fetch_existing_genres_bulk),
+        (cache.existing_screenshots, fetch_existing_screenshots_bulk),
+        (cache.existing_persons, fetch_existing_persons_bulk),
+        (cache.existing_studios, fetch_existing_studios_bulk),
+    ):
+        missing = [anime_id for anime_id in anime_ids if anime_id not in existing]
+        if missing:
+            existing.update(await fetch(cur, missing))
+
+    existing_genres = cache.existing_genres
+    existing_screenshots = cache.existing_screenshots
+    existing_persons = cache.existing_persons
+    existing_studios = cache.existing_studios
+
+    # Blocked countries/seasons change rarely and aren't cached
+    existing_countries = await fetch_existing_blocked_countries_bulk(cur, anime_ids)
+    existing_seasons = await fetch_existing_blocked_seasons_bulk(cur, anime_ids)
+
+    # Phase 2: resolve every name of the batch at once, then build desired sets (last entry per anime wins)
+    if extracted is None:
+        extracted = [None] * len(entries)
+    unresolved = [index for index, names in enumerate(extracted) if names is None]
+    if unresolved:
+        extracted = list(extracted)
+        resolved = await resolve_relation_names(db_pool, cache, [entries[index][2] for index in unresolved])
+        for index, names in zip(unresolved, resolved):
+            extracted[index] = names
+
+    genre_cache, person_cache, studio_cache = cache.genres, cache.persons, cache.studios
+    desired: Dict[int, Tuple[AnimeDict, Set[int], Set[str], Set[Tuple[int, str]], Set[int]]] = {}
+    for (anime_id, item, material), (genres, mapping, studios) in zip(entries, extracted):
+        genre_ids = {genre_cache[name] for name in genres if name in genre_cache}
+        screenshots = set(extract_screenshots(item, material))
+
+        persons: Set[Tuple[int, str]] = set()
+        for role, people in mapping.items():
+            if people:
+                persons.update((person_cache[name], role) for name in people if name in person_cache)
+
+        studio_ids = {studio_cache[name] for name in studios if name in studio_cache}
+        desired[anime_id] = (item, genre_ids, screenshots, persons, studio_ids)
+
+    genres_delete, genres_insert = [], []
+    screenshots_delete, screenshots_insert = [], []
+    persons_delete, persons_insert = [], []
+    studios_delete, studios_insert = [], []
+    countries_delete, countries_insert = [], []
+    seasons_delete, seasons_insert = [], []
+
+    for anime_id, (item, genre_ids, screenshots, persons, studio_ids) in desired.items():
+        genres_delete += [(anime_id, gid) for gid in existing_genres[anime_id] - genre_ids]
+        genres_insert += [(anime_id, gid) for gid in genre_ids - existing_genres[anime_id]]
+
+        screenshots_delete += [(anime_id, url) for url in existing_screenshots[anime_id] - screenshots]
+        screenshots_insert += [(anime_id, url) for url in screenshots - existing_screenshots[anime_id]]
+
+        persons_delete += [(anime_id, pid, role) for pid, role in existing_persons[anime_id] - persons]
+        persons_insert += [(anime_id, pid, role) for pid, role in persons - existing_persons[anime_id]]
+
+        studios_delete += [(anime_id, sid) for sid in existing_studios[anime_id] - studio_ids]
+        studios_insert += [(anime_id, sid) for sid in studio_ids - existing_studios[anime_id]]
+
+        countries = set(get_blocked_countries(item))
+        countries_delete += [(anime_id, country) for country in existing_countries[anime_id] - countries]
+        countries_insert += [(anime_id, country) for country in countries - existing_countries[anime_id]]
+
+        # {"all": "all"} takes the same path and stores ("all", '"all"')
+        blocked_seasons = normalize_blocked_seasons(item.get("blocked_seasons")) or {}
+        stored_seasons = existing_seasons[anime_id]
+        for season, data in stored_seasons.items():
+            if season not in blocked_seasons or blocked_seasons[season] != data:
+                seasons_delete.append((anime_id, season))
+        for season, data in blocked_seasons.items():
+            if season not in stored_seasons or stored_seasons[season] != data:
+                seasons_insert.append((anime_id, season, dumps(data)))
+
+    # Phase 3: flush
+    try:
+        if genres_delete:
             await cur.execute(
-                "SELECT updated_at FROM anime WHERE id=%s",
-                (existing_anime_id,)
+                f"DELETE FROM anime_genres WHERE (anime_id, genre_id) IN ({in_placeholders(len(genres_delete), 2)})",
+                [v for row in genres_delete for v in row]
             )
-            row = await cur.fetchone()
+        if genres_insert:
+            await cur.execute(*multirow_insert(
+                "anime_genres", ["anime_id", "genre_id"], genres_insert, ignore=True
+            ))
 
-            if row:
-                db_updated = row[0]
-                if db_updated and item_updated and item_updated <= db_updated:
-                    return existing_anime_id, False, False
-
-            # Update existing record
-            set_clause = ", ".join([f"{k}=%s" for k in values.keys()])
+        if screenshots_delete:
             await cur.execute(
-                f"UPDATE anime SET {set_clause} WHERE id=%s",
-                (*values.values(), existing_anime_id)
+                f"DELETE FROM anime_screenshots WHERE (anime_id, url) IN ({in_placeholders(len(screenshots_delete), 2)})",
+                [v for row in screenshots_delete for v in row]
             )
+        if screenshots_insert:
+            await cur.execute(*multirow_insert(
+                "anime_screenshots", ["anime_id", "url"], screenshots_insert, ignore=True
+            ))
 
-            # Update kodik_id separately to ensure it's current
+        if persons_delete:
             await cur.execute(
-                "UPDATE anime SET kodik_id = %s WHERE id = %s",
-                (kodik_id, existing_anime_id)
+                f"DELETE FROM anime_persons WHERE (anime_id, person_id, role) IN ({in_placeholders(len(persons_delete), 3)})",
+                [v for row in persons_delete for v in row]
             )
+        if persons_insert:
+            await cur.execute(*multirow_insert(
+                "anime_persons", ["anime_id", "person_id", "role"], persons_insert, ignore=True
+            ))
 
-            return existing_anime_id, True, False
-
-        else:
-            # Check if record exists by kodik_id
+        if studios_delete:
             await cur.execute(
-                "SELECT id, updated_at FROM anime WHERE kodik_id=%s",
-                (kodik_id,)
+                f"DELETE FROM anime_studios WHERE (anime_id, studio_id) IN ({in_placeholders(len(studios_delete), 2)})",
+                [v for row in studios_delete for v in row]
+            )
+        if studios_insert:
+            await cur.execute(*multirow_insert(
+                "anime_studios", ["anime_id", "studio_id"], studios_insert, ignore=True
+            ))
+
+        # Translations rely on the (anime_id, external_id) unique key to skip known ones
+        translations = []
+        for anime_id, item, _ in entries:
+            tr = item.get("translation")
+            if tr:
+                translations.append((anime_id, tr.get("id"), tr.get("title"), tr.get("type")))
+
+        if translations:
+            await cur.execute(*multirow_insert(
+                "anime_translations",
+                ["anime_id", "external_id", "title", "trans_type"],
+                translations,
+                ignore=True
+            ))
+            if cur.rowcount:
+                logger.info(f"Added {cur.rowcount} new translation(s)")
+
+        if countries_delete:
+            await cur.execute(
+                f"DELETE FROM blocked_countries WHERE (anime_id, country) IN ({in_placeholders(len(countries_delete), 2)})",
+                [v for row in countries_delete for v in row]
+            )
+        if seasons_delete:
+            await cur.execute(
+                f"DELETE FROM blocked_seasons WHERE (anime_id, season) IN ({in_placeholders(len(seasons_delete), 2)})",
+                [v for row in seasons_delete for v in row]
             )
-            row = await cur.fetchone()
-
-            if row:
-                # Update existing record by kodik_id
-                anime_id = row[0]
-                values_with_kodik = {"kodik_id": kodik_id, **values}
-                set_clause = ", ".join([f"{k}=%s" for k in values_with_kodik.keys() if k != "kodik_id"])
-                update_values = [v for k, v in values_with_kodik.items() if k != "kodik_id"]
-                await cur.execute(
-                    f"UPDATE anime SET {set_clause} WHERE id=%s",
-                    (*update_values, anime_id)
-                )
-                return anime_id, True, False
-            else:
-                # Insert new record
-                values_with_kodik = {"kodik_id": kodik_id, **values}
-                cols = ", ".join(values_with_kodik.keys())
-                placeholders = ", ".join(["%s"] * len(values_with_kodik))
-                await cur.execute(
-                    f"INSERT INTO anime ({cols}) VALUES ({placeholders})",
-                    tuple(values_with_kodik.values())
-                )
-                return cur.lastrowid, True, True
-
-
-async def fetch_existing_genres(conn: aiomysql.Connection, anime_id: int) -> Set[int]:
-    """Fetch existing genre IDs for an anime."""
-    async with conn.cursor() as cur:
-        await cur.execute(
-            "SELECT genre_id FROM anime_genres WHERE anime_id=%s",
-            (anime_id,)
-        )
-        rows = await cur.fetchall()
-        return {row[0] for row in rows}
-
-
-async def fetch_existing_screenshots(conn: aiomysql.Connection, anime_id: int) -> Set[str]:
-    """Fetch existing screenshot URLs for an anime."""
-    async with conn.cursor() as cur:
-        await cur.execute(
-            "SELECT url FROM anime_screenshots WHERE anime_id=%s",
-            (anime_id,)
-        )
-        rows = await cur.fetchall()
-        return {row[0] for row in rows}
-
 
-async def fetch_existing_persons(conn: aiomysql.Connection, anime_id: int) -> Set[Tuple[int, str]]:
-    """Fetch existing (person_id, role) tuples for an anime."""
-    async with conn.cursor() as cur:
-        await cur.execute(
-            "SELECT person_id, role FROM anime_persons WHERE anime_id=%s",
-            (anime_id,)
-        )
-        rows = await cur.fetchall()
-        return {(row[0], row[1]) for row in rows}
+        if countries_insert:
+            await cur.execute(*multirow_insert(
+                "blocked_countries", ["anime_id", "country"], countries_insert
+            ))
 
+        if seasons_insert:
+            await cur.execute(*multirow_insert(
+                "blocked_seasons", ["anime_id", "season", "blocked_data"], seasons_insert
+            ))
+    except BaseException:
+        # The database may no longer match the cached sets
+        cache.forget_relations(anime_ids)
+        raise
 
-async def fetch_existing_studios(conn: aiomysql.Connection, anime_id: int) -> Set[int]:
-    """Fetch existing studio IDs for an anime."""
-    async with conn.cursor() as cur:
-        await cur.execute(
-            "SELECT studio_id FROM anime_studios WHERE anime_id=%s",
-            (anime_id,)
-        )
-        rows = await cur.fetchall()
-        return {row[0] for row in rows}
+    cache.track_relations(desired)
+    for anime_id, (_, genre_ids, screenshots, persons, studio_ids) in desired.items():
+        existing_genres[anime_id] = genre_ids
+        existing_screenshots[anime_id] = screenshots
+        existing_persons[anime_id] = persons
+        existing_studios[anime_id] = studio_ids
 
 
 async def sync_relations(
-    conn: aiomysql.Connection,
+    cur: aiomysql.Cursor,
+    db_pool: ConnectionPool,
     cache: Cache,
     anime_id: int,
     item: AnimeDict,
     material: Optional[MaterialDict]
 ) -> None:
     """
-    Sync anime relations (genres, screenshots, persons, studios, etc.).
-
-    Uses smart diffing to only insert/delete what changed instead of DELETE ALL.
+    Sync anime relations (genres, screenshots, persons, studios, etc.) for one anime.
 
     Args:
-        conn: Database connection
+        cur: Database cursor
+        db_pool: Connection pool used for name resolution
         cache: Cache instance
         anime_id: Anime ID
         item: Anime item data
         material: Material data
     """
-    async with conn.cursor() as cur:
-        # Smart sync genres
-        genres = extract_genres(material)
-        if genres:
-            existing_genre_ids = await fetch_existing_genres(conn, anime_id)
-            new_genre_ids = set(await cache.get_genre_ids_batch(conn, genres))
-
-            to_delete = existing_genre_ids - new_genre_ids
-            to_insert = new_genre_ids - existing_genre_ids
-
-            if to_delete:
-                await cur.execute(
-                    f"DELETE FROM anime_genres WHERE anime_id=%s AND genre_id IN ({','.join(['%s']*len(to_delete))})",
-                    (anime_id, *to_delete)
-                )
-
-            if to_insert:
-                values = [(anime_id, gid) for gid in to_insert]
-                await cur.executemany(
-                    "INSERT IGNORE INTO anime_genres (anime_id, genre_id) VALUES (%s, %s)",
-                    values
-                )
-        else:
-            # No genres - delete all
-            await cur.execute("DELETE FROM anime_genres WHERE anime_id=%s", (anime_id,))
-
-        # Smart sync screenshots
-        screenshots = extract_screenshots(item, material)
-        if screenshots:
-            existing_screenshots = await fetch_existing_screenshots(conn, anime_id)
-            new_screenshots = set(screenshots)
-
-            to_delete_urls = existing_screenshots - new_screenshots
-            to_insert_urls = new_screenshots - existing_screenshots
-
-            if to_delete_urls:
-                placeholders = ','.join(['%s'] * len(to_delete_urls))
-                await cur.execute(
-                    f"DELETE FROM anime_screenshots WHERE anime_id=%s AND url IN ({placeholders})",
-                    (anime_id, *to_delete_urls)
-                )
-
-            if to_insert_urls:
-                values = [(anime_id, url) for url in to_insert_urls]
-                await cur.executemany(
-                    "INSERT INTO anime_screenshots (anime_id, url) VALUES (%s, %s)",
-                    values
-                )
-        else:
-            # No screenshots - delete all
-            await cur.execute("DELETE FROM anime_screenshots WHERE anime_id=%s", (anime_id,))
-
-        # Smart sync persons
-        person_mapping = get_person_mapping(material)
-        new_persons: Set[Tuple[int, str]] = set()
-
-        for role, people in person_mapping.items():
-            if people:
-                person_ids = await cache.get_person_ids_batch(conn, people)
-                for pid in person_ids:
-                    new_persons.add((pid, role))
-
-        if new_persons:
-            existing_persons = await fetch_existing_persons(conn, anime_id)
-
-            to_delete = existing_persons - new_persons
-            to_insert = new_persons - existing_persons
-
-            if to_delete:
-                # Delete removed persons
-                for pid, role in to_delete:
-                    await cur.execute(
-                        "DELETE FROM anime_persons WHERE anime_id=%s AND person_id=%s AND role=%s",
-                        (anime_id, pid, role)
-                    )
-
-            if to_insert:
-                values = [(anime_id, pid, role) for pid, role in to_insert]
-                await cur.executemany(
-                    "INSERT IGNORE INTO anime_persons (anime_id, person_id, role) VALUES (%s, %s, %s)",
-                    values
-                )
-        else:
-            # No persons - delete all
-            await cur.execute("DELETE FROM anime_persons WHERE anime_id=%s", (anime_id,))
-
-        # Smart sync studios
-        studios = get_studios(material)
-        if studios:
-            existing_studio_ids = await fetch_existing_studios(conn, anime_id)
-            new_studio_ids = set(await cache.get_studio_ids_batch(conn, studios))
-
-            to_delete = existing_studio_ids - new_studio_ids
-            to_insert = new_studio_ids - existing_studio_ids
-
-            if to_delete:
-                await cur.execute(
-                    f"DELETE FROM anime_studios WHERE anime_id=%s AND studio_id IN ({','.join(['%s']*len(to_delete))})",
-                    (anime_id, *to_delete)
-                )
-
-            if to_insert:
-                values = [(anime_id, sid) for sid in to_insert]
-                await cur.executemany(
-                    "INSERT IGNORE INTO anime_studios (anime_id, studio_id) VALUES (%s, %s)",
-                    values
-                )
-        else:
-            # No studios - delete all
-            await cur.execute("DELETE FROM anime_studios WHERE anime_id=%s", (anime_id,))
+    await sync_relations_batch(cur, db_pool, cache, [(anime_id, item, material)])
 
-        # Handle translations (not smart sync - uses check before insert)
-        tr = item.get("translation")
-        if tr:
-            await cur.execute(
-                "SELECT id FROM anime_translations WHERE anime_id=%s AND external_id=%s",
-                (anime_id, tr.get("id"))
-            )
-            existing = await cur.fetchone()
-
-            if not existing:
-                await cur.execute(
-                    "INSERT INTO anime_translations (anime_id, external_id, title, trans_type) VALUES (%s,%s,%s,%s)",
-                    (anime_id, tr.get("id"), tr.get("title"), tr.get("type"))
-                )
-                logger.info(f"Added new translation '{tr.get('title')}' for anime ID {anime_id}")
-
-        # Always delete and recreate blocked_countries and blocked_seasons (simpler for these)
-        await cur.execute("DELETE FROM blocked_countries WHERE anime_id=%s", (anime_id,))
-        await cur.execute("DELETE FROM blocked_seasons WHERE anime_id=%s", (anime_id,))
-
-        # Blocked countries
-        countries = get_blocked_countries(item)
-        if countries:
-            values = [(anime_id, country) for country in countries]
-            await cur.executemany(
-                "INSERT INTO blocked_countries (anime_id, country) VALUES (%s, %s)",
-                values
-            )
 
-        # Blocked seasons
-        blocked_seasons = normalize_blocked_seasons(item.get("blocked_seasons"))
-        if blocked_seasons:
-            if blocked_seasons == {"all": "all"}:
-                await cur.execute(
-                    "INSERT INTO blocked_seasons (anime_id, season, blocked_data) VALUES (%s, %s, %s)",
-                    (anime_id, "all", json.dumps("all"))
-                )
-            else:
-                values = [(anime_id, season, json.dumps(data)) for season, data in blocked_seasons.items()]
-                await cur.executemany(
-                    "INSERT INTO blocked_seasons (anime_id, season, blocked_data) VALUES (%s, %s, %s)",
-                    values
-                )
-
-
-async def check_new_translation(
-    conn: aiomysql.Connection,
-    anime_id: int,
-    item: AnimeDict
-) -> bool:
+async def find_new_translations(
+    cur: aiomysql.Cursor,
+    entries: List[Tuple[int, AnimeDict]]
+) -> List[bool]:
     """
-    Check if item contains a new translation for the anime.
+    Check which entries carry a translation their anime doesn't have yet, with one query.
 
     Args:
-        conn: Database connection
-        anime_id: Anime ID
-        item: Anime item data
+        cur: Database cursor
+        entries: List of (anime_id, item) pairs
 
     Returns:
-        True if new translation exists, False otherwise
+        List of flags, aligned with entries, True where the translation is new
     """
-    tr = item.get("translation")
-    if not tr:
-        return False
-
-    async with conn.cursor() as cur:
-        await cur.execute(
-            "SELECT COUNT(*) FROM anime_translations WHERE anime_id=%s AND external_id=%s",
-            (anime_id, tr.get("id"))
-        )
-        result = await cur.fetchone()
-        return result and result[0] == 0
+    keys = [
+        (anime_id, translation.get("id")) if translation else None
+        for anime_id, translation in ((anime_id, item.get("translation")) for anime_id, item in entries)
+    ]
+    lookup = list({key for key in keys if key})
+    if not lookup:
+        return [False] * len(entries)
+
+    await cur.execute(
+        f"SELECT anime_id, external_id FROM anime_translations "
+        f"WHERE (anime_id, external_id) IN ({in_placeholders(len(lookup), 2)})",
+        [value for key in lookup for value in key]
+    )
+    known = {(anime_id, str(external_id)) for anime_id, external_id in await cur.fetchall()}
+
+    return [key is not None and (key[0], str(key[1])) not in known for key in keys]
@@ -1,5 +1,6 @@
-import aiomysql
-from typing import List
+import asyncio
+from typing import List, Tuple
+from db.connection import ConnectionPool
 from utils.logging_config import logger
 
 CREATE_TABLES: List[str] = [
@@ -56,6 +57,7 @@ CREATE_TABLES: List[str] = [
         external_id INT,
         title TEXT,
         trans_type VARCHAR(50),
+        UNIQUE KEY uq_trans (anime_id, external_id),
         FOREIGN KEY (anime_id) REFERENCES anime(id) ON DELETE CASCADE
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """,
@@ -79,6 +81,7 @@ CREATE_TABLES: List[str] = [
         id INT AUTO_INCREMENT PRIMARY KEY,
         anime_id INT,
         url TEXT,
+        UNIQUE KEY uq_ss (anime_id, url(255)),
         FOREIGN KEY (anime_id) REFERENCES anime(id) ON DELETE CASCADE
     ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
     """,
@@ -133,12 +136,71 @@ CREATE_TABLES: List[str] = [
 ]
 
 
-async def ensure_tables(conn: aiomysql.Connection) -> None:
-    logger.info("Creating database tables...")
+# Unique keys added after the first release: (table, key, columns, query removing duplicates)
+UNIQUE_KEY_MIGRATIONS: List[Tuple[str, str, str, str]] = [
+    (
+        "anime_translations",
+        "uq_trans",
+        "(anime_id, external_id)",
+        """
+        DELETE t1 FROM anime_translations t1
+        JOIN anime_translations t2
+          ON t1.anime_id = t2.anime_id AND t1.external_id = t2.external_id AND t1.id > t2.id
+        """
+    ),
+    (
+        "anime_screenshots",
+        "uq_ss",
+        "(anime_id, url(255))",
+        """
+        DELETE t1 FROM anime_screenshots t1
+        JOIN anime_screenshots t2
+          ON t1.anime_id = t2.anime_id AND LEFT(t1.url, 255) = LEFT(t2.url, 255) AND t1.id > t2.id
+        """
+    ),
+]
+
+# Referenced tables first, then the tables holding foreign keys into them
+CREATE_TABLE_LAYERS: List[List[str]] = [
+    [sql for sql in CREATE_TABLES if "REFERENCES" not in sql],
+    [sql for sql in CREATE_TABLES if "REFERENCES" in sql],
+]
 
-    async with conn.cursor() as cur:
-        for sql in CREATE_TABLES:
+
+async def _execute_ddl(db_pool: ConnectionPool, sql: str) -> None:
+    async with db_pool.acquire() as conn:
+        async with conn.cursor() as cur:
             await cur.execute(sql)
-    await conn.commit()
+
+
+async def _ensure_unique_key(
+    db_pool: ConnectionPool,
+    table: str,
+    key_name: str,
+    columns: str,
+    dedupe_sql: str
+) -> None:
+    async with db_pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+                (table, key_name)
+            )
+            if await cur.fetchone():
+                return
+
+            logger.info(f"Adding unique key {key_name} to {table}")
+            await cur.execute(dedupe_sql)
+            await cur.execute(f"ALTER TABLE {table} ADD UNIQUE KEY {key_name} {columns}")
+
+
+async def ensure_tables(db_pool: ConnectionPool) -> None:
+    logger.info("Creating database tables...")
+
+    for layer in CREATE_TABLE_LAYERS:
+        await asyncio.gather(*(_execute_ddl(db_pool, sql) for sql in layer))
+
+    await asyncio.gather(*(_ensure_unique_key(db_pool, *migration) for migration in UNIQUE_KEY_MIGRATIONS))
 
     logger.info("All tables created successfully")
@@ -0,0 +1,42 @@
+"""Helpers for building multi-row SQL statements."""
+from functools import lru_cache
+from typing import Any, List, Sequence, Tuple
+
+
+@lru_cache(maxsize=256)
+def in_placeholders(count: int, width: int = 1) -> str:
+    """Render placeholders for an IN list of `count` items, each `width` values wide."""
+    item = "%s" if width == 1 else "(" + ",".join(["%s"] * width) + ")"
+    return ",".join([item] * count)
+
+
+@lru_cache(maxsize=256)
+def multirow_insert_sql(table: str, columns: Tuple[str, ...], row_count: int, ignore: bool = False) -> str:
+    """Render an INSERT of `row_count` rows; cached so repeated batch sizes reuse the same text."""
+    row_placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    return (
+        f"INSERT {'IGNORE ' if ignore else ''}INTO {table} ({', '.join(columns)}) VALUES "
+        + ", ".join([row_placeholder] * row_count)
+    )
+
+
+def multirow_insert(
+    table: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    ignore: bool = False
+) -> Tuple[str, List[Any]]:
+    """
+    Build a single INSERT statement carrying every row.
+
+    Args:
+        table: Table name
+        columns: Column names, in the order of the row values
+        rows: Row value tuples
+        ignore: Emit INSERT IGNORE
+
+    Returns:
+        Tuple of (sql, flat_params)
+    """
+    sql = multirow_insert_sql(table, tuple(columns), len(rows), ignore)
+    return sql, [value for row in rows for value in row]
@@ -3,6 +3,7 @@ import signal
 
 from config import SYNC_INTERVAL_SECONDS
 from utils.logging_config import logger
+from api.client import create_session
 from db.connection import pool
 from sync import periodic_sync
 
@@ -19,7 +20,10 @@ async def main() -> None:
 
     try:
         await pool.create()
-        await periodic_sync(stop_event, SYNC_INTERVAL_SECONDS)
+
+        # One session for the process lifetime keeps Kodik connections alive between cycles
+        async with create_session(timeout_seconds=60) as session:
+            await periodic_sync(session, stop_event, SYNC_INTERVAL_SECONDS)
 
     except KeyboardInterrupt:
         logger.info("KeyboardInterrupt received, shutting down...")
@@ -34,7 +38,20 @@ async def main() -> None:
         logger.info("Shutdown complete")
 
 
+def install_event_loop() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        return
+
+    uvloop.install()
+    logger.info("Using uvloop event loop")
+
+
 if __name__ == "__main__":
+    install_event_loop()
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -6,6 +6,9 @@ from utils.logging_config import logger
 AnimeDict = Dict[str, Any]
 MaterialDict = Dict[str, Any]
 
+# Shared stand-in for missing material_data; read-only, never mutate it
+EMPTY_MATERIAL: MaterialDict = {}
+
 
 def validate_year(year: Optional[int]) -> bool:
     if year is None:
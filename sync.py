@@ -1,145 +1,368 @@
 import asyncio
-from typing import Optional
+import logging
+import aiohttp
+import aiomysql
+from collections import Counter
+from typing import List, Optional, Set, Tuple
 from datetime import datetime
 
-from config import BASE_URL, BATCH_SIZE, CONSECUTIVE_OLD_THRESHOLD
+from config import (
+    BASE_URL,
+    CONSECUTIVE_OLD_THRESHOLD,
+    PAGE_LIMIT_FIRST_SYNC,
+    PAGE_LIMIT_INCREMENTAL
+)
 from utils.logging_config import logger
 from utils.metrics import SyncMetrics
 from utils.parsers import parse_datetime
 from utils.sync_state import load_last_sync, save_last_sync
-from api.client import fetch_page, create_session
+from api.client import fetch_page
 from db.connection import pool
 from db.schema import ensure_tables
 from db.cache import Cache
-from db.operations import upsert_anime, sync_relations, check_new_translation
-
-
-async def fetch_and_save(stop_event: Optional[asyncio.Event] = None) -> None:
+from db.operations import (
+    upsert_anime,
+    upsert_anime_batch,
+    sync_relations,
+    sync_relations_batch,
+    resolve_relation_names,
+    find_new_translations,
+    is_known_unchanged
+)
+from models.anime import AnimeDict, MaterialDict, EMPTY_MATERIAL
+
+
+def is_kodik_timestamp(raw: Optional[str]) -> bool:
+    return isinstance(raw, str) and len(raw) == 20 and raw[10] == "T" and raw[19] == "Z"
+
+
+def is_not_newer(raw: Optional[str], last_sync: datetime, last_sync_iso: str) -> bool:
+    if not raw:
+        return False
+
+    # Kodik's "YYYY-MM-DDTHH:MM:SSZ" orders lexicographically, no need to build a datetime
+    if is_kodik_timestamp(raw):
+        return raw[:19] <= last_sync_iso
+
+    item_updated = parse_datetime(raw)
+    return item_updated is not None and item_updated <= last_sync
+
+
+def classify_outcome(
+    anime_id: int,
+    item: AnimeDict,
+    changed: bool,
+    added: bool,
+    new_translation_added: bool
+) -> str:
+    if added:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Added new anime ID {anime_id}: {item.get('title')}")
+        return "added"
+    if new_translation_added:
+        logger.info(f"Added new translation to anime ID {anime_id}")
+        return "updated"
+    if changed:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Updated anime ID {anime_id}: {item.get('title')}")
+        return "updated"
+    return "unchanged"
+
+
+async def process_item(
+    conn: aiomysql.Connection,
+    cache: Cache,
+    item: AnimeDict,
+    material: MaterialDict,
+    metrics: SyncMetrics
+) -> bool:
+    await conn.begin()
+    try:
+        # One cursor serves every statement of the transaction
+        async with conn.cursor() as cur:
+            anime_id, changed, added = await upsert_anime(cur, cache, item, material)
+
+            if not anime_id:
+                raise ValueError(f"Could not resolve anime ID for kodik_id {item.get('id')}")
+
+            new_translation_added = False
+            if not changed and not added:
+                new_translation_added = (await find_new_translations(cur, [(anime_id, item)]))[0]
+
+            if changed or new_translation_added:
+                await sync_relations(cur, pool, cache, anime_id, item, material)
+
+        await conn.commit()
+        cache.commit()
+
+    except Exception as e:
+        await conn.rollback()
+        cache.rollback()
+        logger.error(f"Error processing anime {item.get('id')}: {e}", exc_info=True)
+        metrics.mark_error()
+        return False
+
+    metrics.bulk_add(**{classify_outcome(anime_id, item, changed, added, new_translation_added): 1})
+    return True
+
+
+async def process_batch(
+    conn: aiomysql.Connection,
+    cache: Cache,
+    batch: List[Tuple[AnimeDict, MaterialDict]],
+    metrics: SyncMetrics
+) -> Optional[datetime]:
+    processed: List[AnimeDict] = []
+
+    await conn.begin()
+    try:
+        outcomes = []
+        to_sync = []
+
+        async with conn.cursor() as cur:
+            # Records the cache already knows are unchanged won't have their relations written
+            candidates = [index for index, (item, _) in enumerate(batch) if not is_known_unchanged(cache, item)]
+
+            # Names resolve on other pooled connections while the anime rows are matched and written.
+            # Both are awaited to the end, so nothing is left running on conn when a failure rolls back
+            upserted, resolved = await asyncio.gather(
+                upsert_anime_batch(cur, cache, batch),
+                resolve_relation_names(pool, cache, [batch[index][1] for index in candidates]),
+                return_exceptions=True
+            )
+            for result in (upserted, resolved):
+                if isinstance(result, BaseException):
+                    raise result
+            names_by_index = dict(zip(candidates, resolved))
+
+            for (item, _), (anime_id, _, _) in zip(batch, upserted):
+                if not anime_id:
+                    raise ValueError(f"Could not resolve anime ID for kodik_id {item.get('id')}")
+
+            # Unchanged records still matter when they bring a translation the anime lacks
+            unchanged = [
+                (anime_id, item)
+                for (item, _), (anime_id, changed, added) in zip(batch, upserted)
+                if not changed and not added
+            ]
+            new_translations = iter(await find_new_translations(cur, unchanged))
+
+            sync_names = []
+            for index, ((item, material), (anime_id, changed, added)) in enumerate(zip(batch, upserted)):
+                new_translation_added = False
+                if not changed and not added:
+                    new_translation_added = next(new_translations)
+
+                if changed or new_translation_added:
+                    to_sync.append((anime_id, item, material))
+                    sync_names.append(names_by_index.get(index))
+                outcomes.append((anime_id, item, changed, added, new_translation_added))
+
+            await sync_relations_batch(cur, pool, cache, to_sync, sync_names)
+
+        await conn.commit()
+        cache.commit()
+
+        # Tally locally and touch the shared metrics once per page
+        metrics.bulk_add(**Counter(classify_outcome(*outcome) for outcome in outcomes))
+        processed = [item for item, _ in batch]
+
+    except Exception as e:
+        await conn.rollback()
+        cache.rollback()
+
+        # Fall back to one transaction per record so one bad record doesn't sink the batch
+        logger.error(f"Batch of {len(batch)} records failed, retrying one by one: {e}", exc_info=True)
+        for item, material in batch:
+            if await process_item(conn, cache, item, material, metrics):
+                processed.append(item)
+
+    return newest_updated_at([item.get("updated_at") for item in processed])
+
+
+def newest_updated_at(raw_values: List[Optional[str]]) -> Optional[datetime]:
+    # Kodik timestamps compare as strings, so only the winner needs parsing
+    if raw_values and all(is_kodik_timestamp(raw) for raw in raw_values):
+        winner = parse_datetime(max(raw_values))
+        if winner is not None:
+            return winner
+
+    newest: Optional[datetime] = None
+    for raw in raw_values:
+        item_updated = parse_datetime(raw)
+        if item_updated and (newest is None or item_updated > newest):
+            newest = item_updated
+
+    return newest
+
+
+async def cancel_prefetch(task: Optional[asyncio.Task]) -> bool:
+    """Cancel a pending page download and wait for it so its connection goes back to the pool."""
+    if not task or task.done():
+        return False
+
+    task.cancel()
+    # gather() absorbs the task's own CancelledError but still lets a cancel of the caller through
+    await asyncio.gather(task, return_exceptions=True)
+    return True
+
+
+async def fetch_and_save(
+    session: aiohttp.ClientSession,
+    stop_event: Optional[asyncio.Event] = None,
+    cache: Optional[Cache] = None
+) -> None:
     metrics = SyncMetrics()
+    next_page: Optional[asyncio.Task] = None
 
-    async with pool.acquire() as conn:
-        try:
-            await ensure_tables(conn)
-            cache = Cache()
-            await cache.load(conn)
+    await ensure_tables(pool)
 
-            last_sync = load_last_sync()
-            is_first_sync = last_sync is None
-            newest_update_overall: Optional[datetime] = None
+    try:
+        # File I/O goes to the default executor so it never blocks the event loop
+        loop = asyncio.get_running_loop()
+        last_sync = await loop.run_in_executor(None, load_last_sync)
 
-            if is_first_sync:
-                logger.info("First sync - will process all records")
+        # Connections are borrowed per step, so none is held idle while a page downloads
+        if cache is None:
+            cache = Cache()
+        async with pool.acquire() as conn:
+            # A cache kept from the previous cycle only needs what changed since then
+            if cache.loaded and last_sync:
+                await cache.refresh_since(conn, last_sync)
             else:
-                logger.info(f"Incremental sync - last sync was {last_sync}")
-
-            async with create_session(timeout_seconds=60) as session:
-                page_url = BASE_URL
-                page_num = 0
-                total_count = 0
-                consecutive_old = 0
-
-                while page_url:
-                    if stop_event and stop_event.is_set():
-                        logger.info("Stop signal received, halting sync")
-                        break
-
-                    try:
-                        data = await fetch_page(session, page_url)
-                    except Exception as e:
-                        logger.error(f"Failed to fetch page: {e}", exc_info=True)
-                        metrics.mark_error()
+                await cache.load(conn)
+        cache.reset_stats()
+        is_first_sync = last_sync is None
+        last_sync_iso = last_sync.isoformat(timespec="seconds") if last_sync else ""
+        newest_update_overall: Optional[datetime] = None
+
+        if is_first_sync:
+            logger.info("First sync - will process all records")
+        else:
+            logger.info(f"Incremental sync - last sync was {last_sync}")
+
+        # Incremental pages just fit the old-record run that ends the sync, so a quiet cycle reads one page
+        page_limit = PAGE_LIMIT_FIRST_SYNC if is_first_sync else PAGE_LIMIT_INCREMENTAL
+        page_url = f"{BASE_URL}&limit={page_limit}"
+        page_num = 0
+        total_count = 0
+        consecutive_old = 0
+        # Kodik ids handled this cycle: rows shifting between pages during pagination come back again
+        seen_ids: Set[str] = set()
+        duplicates = 0
+
+        # Each page downloads in a task started as soon as its URL is known,
+        # overlapping the database work of the page before it
+        next_page = asyncio.create_task(fetch_page(session, page_url))
+
+        while page_url:
+            if stop_event and stop_event.is_set():
+                logger.info("Stop signal received, halting sync")
+                break
+
+            try:
+                data = await next_page
+                next_page = None
+            except Exception as e:
+                logger.error(f"Failed to fetch page: {e}", exc_info=True)
+                metrics.mark_error()
+                break
+
+            if not data:
+                break
+
+            page_num += 1
+            logger.info(f"=== Processing page {page_num} ===")
+
+            page_url = data.get("next_page")
+            results = data.get("results", [])
+
+            if page_url:
+                next_page = asyncio.create_task(fetch_page(session, page_url))
+
+            entries = []
+            for item in results:
+                if stop_event and stop_event.is_set():
+                    logger.info("Stop signal received during page processing")
+                    break
+
+                if last_sync and is_not_newer(item.get("updated_at"), last_sync, last_sync_iso):
+                    consecutive_old += 1
+                    if consecutive_old >= CONSECUTIVE_OLD_THRESHOLD:
+                        cancelled = await cancel_prefetch(next_page)
+                        next_page = None
+                        logger.info(
+                            f"Encountered {consecutive_old} consecutive old records, stopping"
+                            + (" (prefetched next page cancelled)" if cancelled else "")
+                        )
+                        page_url = None
                         break
-
-                    if not data:
-                        break
-
-                    page_num += 1
-                    logger.info(f"=== Processing page {page_num} ===")
-
-                    page_url = data.get("next_page")
-                    results = data.get("results", [])
-
-                    for item in results:
-                        if stop_event and stop_event.is_set():
-                            logger.info("Stop signal received during page processing")
-                            break
-
-                        item_updated = parse_datetime(item.get("updated_at"))
-                        if not is_first_sync and last_sync and item_updated and item_updated <= last_sync:
-                            consecutive_old += 1
-                            if consecutive_old >= CONSECUTIVE_OLD_THRESHOLD:
-                                logger.info(f"Encountered {consecutive_old} consecutive old records, stopping")
-                                page_url = None 
-                                break
-                            continue
-                        else:
-                            consecutive_old = 0
-
-                        try:
-                            material = item.get("material_data") or {}
-                            anime_id, changed, added = await upsert_anime(conn, item, material)
-
-                            new_translation_added = False
-                            if not changed and not added and anime_id:
-                                new_translation_added = await check_new_translation(conn, anime_id, item)
-
-                            if changed or new_translation_added:
-                                await sync_relations(conn, cache, anime_id, item, material)
-
-                                if added:
-                                    metrics.mark_added()
-                                    logger.debug(f"Added new anime ID {anime_id}: {item.get('title')}")
-                                elif new_translation_added:
-                                    metrics.mark_updated()
-                                    logger.info(f"Added new translation to anime ID {anime_id}")
-                                else:
-                                    metrics.mark_updated()
-                                    logger.debug(f"Updated anime ID {anime_id}: {item.get('title')}")
-                            else:
-                                metrics.mark_unchanged()
-
-                            total_count += 1
-
-                            if total_count % BATCH_SIZE == 0:
-                                await conn.commit()
-                                logger.info(
-                                    f"Commit after {total_count} records. "
-                                    f"Added: {metrics.added_count}, "
-                                    f"Updated: {metrics.updated_count}, "
-                                    f"Unchanged: {metrics.unchanged_count}"
-                                )
-
-                            if item_updated:
-                                if newest_update_overall is None or item_updated > newest_update_overall:
-                                    newest_update_overall = item_updated
-
-                        except Exception as e:
-                            logger.error(f"Error processing anime {item.get('id')}: {e}", exc_info=True)
-                            metrics.mark_error()
-
-                    await conn.commit()
-                    logger.info("Page sync committed")
-
-            if newest_update_overall:
-                save_last_sync(newest_update_overall)
-            await conn.commit()
-            metrics.log_summary()
-
-        except Exception as e:
-            logger.error(f"Sync failed: {e}", exc_info=True)
-            raise
-
-
-async def periodic_sync(stop_event: asyncio.Event, interval_seconds: int) -> None:
+                    continue
+                else:
+                    consecutive_old = 0
+
+                kodik_id = item.get("id")
+                if kodik_id:
+                    if kodik_id in seen_ids:
+                        duplicates += 1
+                        continue
+                    seen_ids.add(kodik_id)
+
+                entries.append((item, item.get("material_data") or EMPTY_MATERIAL))
+
+            # One transaction per page
+            if entries:
+                async with pool.acquire() as conn:
+                    page_newest = await process_batch(conn, cache, entries, metrics)
+                total_count += len(entries)
+
+                logger.info(
+                    f"Commit after {total_count} records. "
+                    f"Added: {metrics.added_count}, "
+                    f"Updated: {metrics.updated_count}, "
+                    f"Unchanged: {metrics.unchanged_count}"
+                )
+
+                if page_newest:
+                    if newest_update_overall is None or page_newest > newest_update_overall:
+                        newest_update_overall = page_newest
+
+        if duplicates:
+            logger.info(f"Skipped {duplicates} records already processed this cycle")
+
+        if newest_update_overall:
+            await loop.run_in_executor(None, save_last_sync, newest_update_overall)
+        metrics.log_summary()
+        cache.log_stats()
+
+    except Exception as e:
+        logger.error(f"Sync failed: {e}", exc_info=True)
+        raise
+
+    finally:
+        # Stop signal, early exit or failure: don't leave a page download running
+        await cancel_prefetch(next_page)
+
+
+async def periodic_sync(
+    session: aiohttp.ClientSession,
+    stop_event: asyncio.Event,
+    interval_seconds: int
+) -> None:
     logger.info(f"Starting periodic sync (interval: {interval_seconds} seconds)")
 
+    # Loaded on the first cycle and refreshed incrementally after that
+    cache = Cache()
+
     while not stop_event.is_set():
         logger.info("=== Starting sync cycle ===")
 
         try:
-            await fetch_and_save(stop_event)
+            await fetch_and_save(session, stop_event, cache)
         except Exception as e:
             logger.error(f"Sync cycle failed: {e}", exc_info=True)
+            # Don't trust a cache from a failed cycle; the next one reloads it
+            cache.clear()
 
         if stop_event.is_set():
             break
@@ -1,5 +1,7 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config import LOG_FILE
 
 
@@ -16,7 +18,14 @@ def setup_logger(name: str = __name__) -> logging.Logger:
         )
         formatter = logging.Formatter("[%(asctime)s] %(levelname)s: %(message)s")
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
+
+        # Writes and rotation happen on the listener thread; the event loop only enqueues records
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+        logger.addHandler(QueueHandler(log_queue))
 
     return logger
 
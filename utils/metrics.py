@@ -1,5 +1,5 @@
+import time
 from dataclasses import dataclass, field
-from datetime import datetime
 from typing import Optional
 from utils.logging_config import logger
 
@@ -10,8 +10,9 @@ class SyncMetrics:
     updated_count: int = 0
     unchanged_count: int = 0
     errors_count: int = 0
-    start_time: Optional[datetime] = field(default_factory=datetime.now)
-    end_time: Optional[datetime] = None
+    # Monotonic clock readings: durations stay correct if the wall clock jumps mid-sync
+    start_time: float = field(default_factory=time.monotonic)
+    end_time: Optional[float] = None
 
     @property
     def total_count(self) -> int:
@@ -19,9 +20,9 @@ class SyncMetrics:
 
     @property
     def duration_seconds(self) -> Optional[float]:
-        if self.start_time and self.end_time:
-            return (self.end_time - self.start_time).total_seconds()
-        return None
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
 
     def mark_added(self) -> None:
         self.added_count += 1
@@ -35,8 +36,14 @@ class SyncMetrics:
     def mark_error(self) -> None:
         self.errors_count += 1
 
+    def bulk_add(self, added: int = 0, updated: int = 0, unchanged: int = 0, errors: int = 0) -> None:
+        self.added_count += added
+        self.updated_count += updated
+        self.unchanged_count += unchanged
+        self.errors_count += errors
+
     def finish(self) -> None:
-        self.end_time = datetime.now()
+        self.end_time = time.monotonic()
 
     def log_summary(self) -> None:
         self.finish()
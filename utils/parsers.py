@@ -1,12 +1,37 @@
+import re
 from datetime import datetime, timezone, date
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 from config import YEAR_MIN, YEAR_MAX
 from utils.logging_config import logger
 
+try:
+    from dateutil.parser import parse as dateutil_parse
+except ImportError:
+    dateutil_parse = None
 
-def parse_datetime(s: Optional[str]) -> Optional[datetime]:
-    if not s:
-        return None
+_YMD_RE = re.compile(r"^(\d{4})[-./](\d{1,2})[-./](\d{1,2})$")
+_DMY_RE = re.compile(r"^(\d{1,2})[-./](\d{1,2})[-./](\d{4})$")
+_YM_RE = re.compile(r"^(\d{4})[-/](\d{1,2})$")
+_MONTH_YEAR_RE = re.compile(r"^([A-Za-z]+)\.?\s+(\d{4})$")
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+
+# Kodik repeats the same timestamps and dates across items; results are immutable, so memoise them
+@lru_cache(maxsize=16384)
+def _parse_datetime_cached(s: str) -> Optional[datetime]:
+    # Kodik sends "YYYY-MM-DDTHH:MM:SSZ"; slice it directly, anything odd falls through to fromisoformat
+    if len(s) == 20 and s[10] == "T" and s[19] == "Z":
+        try:
+            return datetime(
+                int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                int(s[11:13]), int(s[14:16]), int(s[17:19])
+            )
+        except ValueError:
+            pass
 
     try:
         if s.endswith("Z"):
@@ -27,10 +52,51 @@ def parse_datetime(s: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def parse_date(s: Optional[str]) -> Optional[date]:
+def parse_datetime(s: Optional[str]) -> Optional[datetime]:
     if not s:
         return None
 
+    if not isinstance(s, str):
+        logger.warning(f"Invalid datetime value '{s}': expected a string")
+        return None
+
+    return _parse_datetime_cached(s)
+
+
+def _build_date(year: Any, month: Any, day: Any) -> Optional[date]:
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _parse_date_regex(s: str) -> Optional[date]:
+    match = _YMD_RE.match(s)
+    if match:
+        year, month, day = match.groups()
+        return _build_date(year, month, day)
+
+    match = _DMY_RE.match(s)
+    if match:
+        day, month, year = match.groups()
+        return _build_date(year, month, day)
+
+    match = _YM_RE.match(s)
+    if match:
+        year, month = match.groups()
+        return _build_date(year, month, 1)
+
+    match = _MONTH_YEAR_RE.match(s)
+    if match:
+        month = _MONTHS.get(match.group(1)[:3].lower())
+        if month:
+            return _build_date(match.group(2), month, 1)
+
+    return None
+
+
+@lru_cache(maxsize=16384)
+def _parse_date_cached(s: str) -> Optional[date]:
     try:
         if len(s) == 4 and s.isdigit():
             year = int(s)
@@ -42,18 +108,39 @@ def parse_date(s: Optional[str]) -> Optional[date]:
         return datetime.fromisoformat(s).date()
 
     except ValueError as e:
+        parsed = _parse_date_regex(s.strip())
+        if parsed:
+            if YEAR_MIN <= parsed.year <= YEAR_MAX:
+                return parsed
+            logger.warning(f"Year out of valid range in date: {s}")
+            return None
+
         logger.warning(f"Invalid date format '{s}': {e}")
 
+        if dateutil_parse is None:
+            logger.error(f"Failed to parse date '{s}': dateutil is not installed")
+            return None
+
         try:
-            from dateutil.parser import parse
-            dt = parse(s, fuzzy=True)
+            dt = dateutil_parse(s, fuzzy=True)
             if dt.year < YEAR_MIN or dt.year > YEAR_MAX:
                 logger.warning(f"Year out of valid range in date: {s}")
                 return None
             return dt.date()
-        except (ImportError, ValueError) as fallback_error:
+        except (ValueError, OverflowError) as fallback_error:
             logger.error(f"Failed to parse date '{s}': {fallback_error}")
             return None
     except Exception as e:
         logger.error(f"Unexpected error parsing date '{s}': {e}", exc_info=True)
         return None
+
+
+def parse_date(s: Optional[str]) -> Optional[date]:
+    if not s:
+        return None
+
+    if not isinstance(s, str):
+        logger.warning(f"Invalid date value '{s}': expected a string")
+        return None
+
+    return _parse_date_cached(s)
@@ -4,24 +4,44 @@ from typing import Optional
 from config import LAST_SYNC_FILE
 from utils.logging_config import logger
 
+# The file is only read on the first call; later calls return the value kept here
+_last_sync: Optional[datetime] = None
+_last_sync_loaded = False
+
 
 def load_last_sync() -> Optional[datetime]:
+    global _last_sync, _last_sync_loaded
+
+    if _last_sync_loaded:
+        return _last_sync
+
+    _last_sync_loaded = True
+
     if not os.path.exists(LAST_SYNC_FILE):
         return None
 
     try:
         with open(LAST_SYNC_FILE, "r") as f:
             ts = f.read().strip()
-            return datetime.fromisoformat(ts)
+            _last_sync = datetime.fromisoformat(ts)
+            return _last_sync
     except Exception as e:
         logger.warning(f"Failed to load last sync time: {e}")
         return None
 
 
 def save_last_sync(dt: datetime) -> None:
+    global _last_sync, _last_sync_loaded
+
     try:
-        with open(LAST_SYNC_FILE, "w") as f:
+        # Write a temp file and rename it over the old one so a crash never leaves a partial timestamp
+        tmp_file = f"{LAST_SYNC_FILE}.tmp"
+        with open(tmp_file, "w") as f:
             f.write(dt.isoformat())
+        os.replace(tmp_file, LAST_SYNC_FILE)
+
+        _last_sync = dt
+        _last_sync_loaded = True
         logger.info(f"Saved last sync time: {dt.isoformat()}")
     except Exception as e:
         logger.error(f"Failed to save last sync time: {e}", exc_info=True)